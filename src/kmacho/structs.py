@@ -12,41 +12,161 @@
 #  Copyright (c) kat 2021.
 #
 
-class Struct:
+import struct
+
+from contextlib import contextmanager
+from itertools import accumulate
+
+# struct module format codes for each field size we support; anything else is unpacked as a raw byte string
+_FORMAT_CODES = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+
+class StructMeta(type):
+    """
+    Metaclass for Struct and its subclasses.
+
+    Turns the `_FIELDNAMES` a subclass declares into `__slots__`, so field values live directly on the instance
+        rather than in per-instance dicts, and builds the class-level packers used to unpack the fields.
+
+    Each subclass also gets `_unpack_le`/`_unpack_be`, straight-line functions generated for its exact layout that
+        unpack raw bytes and store every field on an instance, with no per-field loop or lookups.
+
+    Per-field data is kept in tuples parallel to `_FIELDNAMES` (which is frozen into a tuple itself), so internal
+        code works with field indexes; `_NAME_TO_IDX` maps a field name to its index.
+    """
+
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        for attr in ('_FIELDNAMES', '_SIZES'):
+            if attr in namespace:
+                namespace[attr] = tuple(namespace[attr])
+
+        namespace.setdefault('__slots__', namespace.get('_FIELDNAMES', ()))
+
+        cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+
+        # Lets __getattr__/__setattr__ tell fields apart from bookkeeping attributes, and find their index, in O(1)
+        cls._NAME_TO_IDX = {field: index for index, field in enumerate(getattr(cls, '_FIELDNAMES', ()))}
+
+        if '_FIELDNAMES' in namespace:
+            # Slot descriptor setters, writing a field while bypassing our __setattr__
+            cls._FIELD_SETTERS = tuple(getattr(cls, field).__set__ for field in cls._FIELDNAMES)
+            # Slot descriptor getters; these raise AttributeError for an unset slot without going through __getattr__
+            cls._FIELD_GETTERS = tuple(getattr(cls, field).__get__ for field in cls._FIELDNAMES)
+            cls._field_values = staticmethod(mcs._build_getter(cls))
+
+        if '_SIZES' in namespace:
+            if 'SIZE' not in namespace:
+                cls.SIZE = sum(cls._SIZES)
+
+            # Byte offset of each field within the struct
+            cls._OFFSETS = tuple(accumulate((0,) + tuple(cls._SIZES[:-1])))
+
+            fmt = ''.join(_FORMAT_CODES.get(size, f'{size}s') for size in cls._SIZES)
+            cls._PACKER_LE = struct.Struct('<' + fmt)
+            cls._PACKER_BE = struct.Struct('>' + fmt)
+
+            cls._unpack_le = staticmethod(mcs._build_unpacker(cls, cls._PACKER_LE, "little"))
+            cls._unpack_be = staticmethod(mcs._build_unpacker(cls, cls._PACKER_BE, "big"))
+
+        return cls
+
+    @staticmethod
+    def _build_unpacker(cls, packer, byte_order):
+        """
+        Generate the unpack function for a struct class and byte order
+
+        For a (cmd, cmdsize) struct, the generated code is:
+
+            def _unpack(instance, raw):
+                cmd, cmdsize, = _unpack_from(raw, 0)
+                _set_cmd(instance, cmd)
+                _set_cmdsize(instance, cmdsize)
+
+        :param cls: Struct subclass
+        :param packer: struct.Struct for the class's layout in `byte_order`
+        :param byte_order: Little/Big Endian
+        :return: Function taking (instance, raw)
+        """
+        namespace = {'_unpack_from': packer.unpack_from, '_from_bytes': int.from_bytes}
+        lines = ['def _unpack(instance, raw):',
+                 f'    {"".join(field + ", " for field in cls._FIELDNAMES)}= _unpack_from(raw, 0)']
+
+        for field, size, setter in zip(cls._FIELDNAMES, cls._SIZES, cls._FIELD_SETTERS):
+            # Write straight to the slot; the values come from the buffer, so __setattr__ has nothing to write back
+            namespace[f'_set_{field}'] = setter
+
+            value = field
+            if size not in _FORMAT_CODES:
+                # Fields without a native format code (e.g. 16 byte names/uuids) are still exposed as ints
+                value = f'_from_bytes({field}, "{byte_order}")'
+            lines.append(f'    _set_{field}(instance, {value})')
+
+        exec(compile('\n'.join(lines), f'<{cls.__name__} unpacker>', 'exec'), namespace)
+        return namespace['_unpack']
+
+    @staticmethod
+    def _build_getter(cls):
+        """
+        Generate a function returning a tuple of every field value on an instance, in field order
+
+        :param cls: Struct subclass
+        :return: Function taking (instance)
+        """
+        namespace = {}
+        fields = ''.join(f'instance.{field}, ' for field in cls._FIELDNAMES)
+        source = f'def _field_values(instance):\n    return ({fields})'
+
+        exec(compile(source, f'<{cls.__name__} getter>', 'exec'), namespace)
+        return namespace['_field_values']
+
+
+class Struct(metaclass=StructMeta):
     """
     Custom namedtuple-esque Struct representation. Can be unpacked from bytes or manually created with existing
         field values
 
-    Subclassed and passed `fields` and `sizes` values.
+    Subclasses only declare `_FIELDNAMES` and `_SIZES`; StructMeta builds everything else from them (including
+        `SIZE`, if it isn't declared).
 
     Fields are exposed as read-write attributes, and when written to, will update the backend
         byte representation of the struct, accessible via the .raw attribute
 
+    .raw is a memoryview over a buffer owned by the struct, so slicing it doesn't copy, and it reflects later writes
+        to the struct's fields. Use bytes(struct.raw) to take a snapshot.
+
+    Fields are stored in `__slots__` generated from `_FIELDNAMES` by StructMeta, so subclasses can't be given
+        arbitrary extra attributes.
+
+    Structs created from bytes are decoded lazily; the fields are only unpacked from .raw the first time one of them
+        is read.
+
     """
 
+    # Ordered hottest first (.raw and .off are read together for nearly every loaded struct), so they share the
+    #   start of the instance layout; subclass field slots follow these.
+    __slots__ = ('_raw_buf', 'off', '_initialized', 'byte_order')
+
     @staticmethod
     def create_with_bytes(struct_class, raw, byte_order="little"):
         """
         Unpack a struct from raw bytes
 
         :param struct_class: Struct subclass
-        :param raw: Bytes
+        :param raw: Bytes-like object (bytes, bytearray, memoryview, mmap slice); missing bytes are read as zero
         :param byte_order: Little/Big Endian Struct Unpacking
         :return: struct_class Instance
         """
         instance: Struct = struct_class(byte_order)
-        current_off = 0
-        raw = bytearray(raw)
 
-        for field in instance._field_list:
-            size = instance._field_sizes[field]
-            data = raw[current_off:current_off + size]
+        # Slicing through a memoryview means the struct's bytes are copied exactly once, whatever raw's type is
+        data = memoryview(raw)[:struct_class.SIZE]
 
-            instance._fields[field] = int.from_bytes(data, byte_order)
+        # Fields are left unset here, __getattr__ decodes them from the buffer when they're first read.
+        # If raw is too short (e.g. a truncated file), the rest of the buffer stays zeroed, as do those fields.
+        instance._raw_buf[:len(data)] = data
 
-            instance.raw += data
-            instance.initialized = True
-            current_off += size
+        # The buffer already holds every field, so skip the initialized setter (and our __setattr__)
+        object.__setattr__(instance, '_initialized', True)
 
         return instance
 
@@ -63,11 +183,11 @@ class Struct:
 
         instance: Struct = struct_class(byte_order)
 
-        for i, field in enumerate(instance._field_list):
-            instance._fields[field] = values[i]
+        for setter, value in zip(struct_class._FIELD_SETTERS, values):
+            setter(instance, value)
 
         instance._rebuild_raw()
-        instance.initialized = True
+        object.__setattr__(instance, '_initialized', True)
         return instance
 
     def typename(self):
@@ -78,75 +198,161 @@ class Struct:
 
     def __str__(self):
         text = f'{self.__class__.__name__}('
-        for field in self._field_list:
-            text += f'{field}={hex(self._fields[field])}, '
+        for field, value in zip(self._FIELDNAMES, self._field_values(self)):
+            text += f'{field}={hex(value)}, '
         return text[:-2] + ')'
 
-    def __init__(self, fields=None, sizes=None, byte_order="little"):
-        if sizes is None:
+    @property
+    def raw(self):
+        return memoryview(self._raw_buf)
+
+    @property
+    def initialized(self):
+        return self._initialized
+
+    @initialized.setter
+    def initialized(self, value):
+        if value and not self._initialized:
+            # Fields set so far haven't been written to the buffer; do that now, which also decodes any unset ones,
+            #   so an initialized struct always has either none or all of its fields set
+            self._rebuild_raw()
+        object.__setattr__(self, '_initialized', value)
+
+    def __init__(self, byte_order="little"):
+        if not hasattr(type(self), '_SIZES'):
             raise AssertionError(
                 "Do not use the bare Struct class; it must be implemented in an actual type; Missing Sizes")
 
-        if fields is None:
+        if not hasattr(type(self), '_FIELDNAMES'):
             raise AssertionError(
                 "Do not use the bare Struct class; it must be implemented in an actual type; Missing Fields")
 
-        # Declare this first to avoid a recursion error
-        self._fields = {}
+        # Declare this first, __setattr__ checks it
+        self._initialized = False
 
         self.byte_order = byte_order
-        self.initialized = False
-
-        self._field_list = fields
-        self._field_sizes = {}
-        self._sizeof = sum(sizes)
-
-        for index, i in enumerate(fields):
-            self._fields[i] = 0
-            self._field_sizes[i] = sizes[index]
 
+        # Fields aren't zero-filled; until they're set, reading one decodes it from this (zeroed) buffer
         self.off = 0
-        self.raw = bytearray(b'')
+        self._raw_buf = bytearray(self.SIZE)
 
     def _rebuild_raw(self):
-        raw = bytearray()
-        for field in self._field_list:
-            size = self._field_sizes[field]
+        packer = self._PACKER_BE if self.byte_order == "big" else self._PACKER_LE
+
+        # Fields can be given as either ints or bytes; normalize them to what the packer expects for their size
+        values = []
+        for size, field_dat in zip(self._SIZES, self._field_values(self)):
+            if size in _FORMAT_CODES:
+                if not isinstance(field_dat, int):
+                    assert len(field_dat) == size
+                    field_dat = int.from_bytes(field_dat, self.byte_order)
+            elif isinstance(field_dat, int):
+                field_dat = field_dat.to_bytes(size, byteorder=self.byte_order)
+            else:
+                assert len(field_dat) == size
+                field_dat = bytes(field_dat)
+
+            values.append(field_dat)
+
+        # Packed in place, the buffer (and any views of it handed out through .raw) is never reallocated
+        packer.pack_into(self._raw_buf, 0, *values)
+
+    @contextmanager
+    def batch_update(self):
+        """
+        Defer updating .raw while several fields are written, then pack every field once on exit
 
-            field_dat = self._fields[field]
+            with cmd.batch_update():
+                cmd.dataoff = dataoff
+                cmd.datasize = datasize
 
-            data = None
+        :return: Context manager yielding this struct
+        """
+        initialized = self._initialized
+        object.__setattr__(self, '_initialized', False)
+        try:
+            yield self
+        finally:
+            # Structs still being built (e.g. inside create_with_values) are packed by their creator instead
+            if initialized:
+                self._rebuild_raw()
+            object.__setattr__(self, '_initialized', initialized)
 
-            if isinstance(field_dat, int):
-                data = field_dat.to_bytes(size, byteorder=self.byte_order)
-            elif isinstance(field_dat, bytearray) or isinstance(field_dat, bytes):
-                data = self._fields[field]
+    def bulk_set(self, **fields):
+        """
+        Set several fields at once, updating .raw a single time
 
-            assert data is not None
+        :param fields: field name/value pairs
+        """
+        with self.batch_update():
+            for field, value in fields.items():
+                setattr(self, field, value)
 
-            raw += bytearray(data)
+    def __len__(self):
+        return self.SIZE
 
-        assert len(raw) == self._sizeof
+    def __reduce__(self):
+        # The default reduction (used by copy and pickle) restores the subclass field slots before the base
+        #   class's, but __setattr__ reads `_initialized`; rebuild the struct from its bytes instead.
+        state = {'off': self.off}
+        if not self._initialized:
+            # Fields set before initialization haven't been written to the buffer yet, so carry them over
+            state['initialized'] = False
+            for field in self._FIELDNAMES:
+                state[field] = getattr(self, field)
+        return Struct.create_with_bytes, (type(self), bytes(self._raw_buf), self.byte_order), (None, state)
 
-        self.raw = raw
+    def _write_field(self, index, value):
+        # Update just this field's bytes in the backing buffer, at its precomputed offset
+        size = self._SIZES[index]
+        off = self._OFFSETS[index]
 
-    def __len__(self):
-        return self._sizeof
+        if isinstance(value, int):
+            value = value.to_bytes(size, byteorder=self.byte_order)
+
+        assert len(value) == size
+
+        self._raw_buf[off:off + size] = value
 
     def __getattr__(self, item):
-        if item == '_fields':
-            return {}
-        if item in self._fields:
-            return self._fields[item]
-        raise AttributeError(f'{item} not in struct or internal properties')
+        # Only reached for attributes without a value, which for fields means they haven't been decoded yet
+        index = self._NAME_TO_IDX.get(item)
+        if index is None:
+            raise AttributeError(f'{item} not in struct or internal properties')
+
+        if self._initialized:
+            # The buffer is up to date with every field, so decode all of them in one go. This can't clobber a
+            #   set field: an initialized struct is decoded before its first field write (see __setattr__), and
+            #   the initialized setter packs any fields set before it, so here none of its slots are set.
+            unpack = self._unpack_be if self.byte_order == "big" else self._unpack_le
+            unpack(self, self._raw_buf)
+            return object.__getattribute__(self, item)
+
+        # Other fields may have been set without being written to the buffer yet; only decode this one
+        off = self._OFFSETS[index]
+        size = self._SIZES[index]
+        if size == 1:
+            # Indexing reads a byte without building a slice for int.from_bytes
+            value = self._raw_buf[off]
+        else:
+            value = int.from_bytes(self._raw_buf[off:off + size], self.byte_order)
+        object.__setattr__(self, item, value)
+        return value
 
     def __setattr__(self, key, value):
-        if key in self._fields:
-            self._fields[key] = value
-            if self.initialized:
-                self._rebuild_raw()
+        index = self._NAME_TO_IDX.get(key)
+        if index is not None and self._initialized:
+            try:
+                self._FIELD_GETTERS[index](self)
+            except AttributeError:
+                # Nothing has been decoded yet; do it now, so a later read of another field can't run the
+                #   whole-struct unpack over the value being written here
+                unpack = self._unpack_be if self.byte_order == "big" else self._unpack_le
+                unpack(self, self._raw_buf)
+            object.__setattr__(self, key, value)
+            self._write_field(index, value)
         else:
-            super().__setattr__(key, value)
+            object.__setattr__(self, key, value)
 
 
 class fat_header(Struct):
@@ -162,9 +368,6 @@ class fat_header(Struct):
     _SIZES = [4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class fat_arch(Struct):
     """
@@ -177,27 +380,18 @@ class fat_arch(Struct):
     _SIZES = [4, 4, 4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class dyld_header(Struct):
     _FIELDNAMES = ['magic', 'cpu_type', 'cpu_subtype', 'filetype', 'loadcnt', 'loadsize', 'flags', 'void']
     _SIZES = [4, 4, 4, 4, 4, 4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class unk_command(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize']
     _SIZES = [4, 4]
     SIZE = 8
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class segment_command_64(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize', 'segname', 'vmaddr', 'vmsize', 'fileoff', 'filesize', 'maxprot',
@@ -205,9 +399,6 @@ class segment_command_64(Struct):
     _SIZES = [4, 4, 16, 8, 8, 8, 8, 4, 4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class section_64(Struct):
     _FIELDNAMES = ['sectname', 'segname', 'addr', 'size', 'offset', 'align', 'reloff',
@@ -215,18 +406,12 @@ class section_64(Struct):
     _SIZES = [16, 16, 8, 8, 4, 4, 4, 4, 4, 4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class symtab_command(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize', 'symoff', 'nsyms', 'stroff', 'strsize']
     _SIZES = [4, 4, 4, 4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class dysymtab_command(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize', 'ilocalsym', 'nlocalsym', 'iextdefsym', 'nextdefsym',
@@ -236,99 +421,66 @@ class dysymtab_command(Struct):
     _SIZES = [4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class dylib(Struct):
     _FIELDNAMES = ['name', 'timestamp', 'current_version', 'compatibility_version']
     _SIZES = [4, 4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class dylib_command(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize', 'dylib']
     _SIZES = [4, 4, 16]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class dylinker_command(Struct):
     _FIELDNAMES = ["cmd", "cmdsize", "name"]
     _SIZES = [4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class sub_client_command(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize', 'offset']
     _SIZES = [4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class uuid_command(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize', 'uuid']
     _SIZES = [4, 4, 16]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class build_version_command(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize', 'platform', 'minos', 'sdk', 'ntools']
     _SIZES = [4, 4, 4, 4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class entry_point_command(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize', 'entryoff', 'stacksize']
     _SIZES = [4, 4, 8, 8]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class rpath_command(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize', 'path']
     _SIZES = [4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class source_version_command(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize', 'version']
     _SIZES = [4, 4, 8]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class linkedit_data_command(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize', 'dataoff', 'datasize']
     _SIZES = [4, 4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class dyld_info_command(Struct):
     _FIELDNAMES = ['cmd', 'cmdsize', 'rebase_off', 'rebase_size', 'bind_off', 'bind_size',
@@ -337,23 +489,26 @@ class dyld_info_command(Struct):
     _SIZES = [4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
-
 
 class symtab_entry(Struct):
     _FIELDNAMES = ["str_index", "type", "sect_index", "desc", "value"]
     _SIZES = [4, 1, 1, 2, 8]
     SIZE = sum(_SIZES)
 
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
+    @classmethod
+    def iter_unpack_bulk(cls, raw, byte_order="little"):
+        """
+        Unpack every entry in raw bytes with the struct module's C unpacker.
+
+        :param raw: Bytes-like object containing the entries, its length must be a multiple of SIZE
+        :param byte_order: Little/Big Endian Struct Unpacking
+        :return: Iterator of (str_index, type, sect_index, desc, value) tuples
+        """
+        packer = cls._PACKER_BE if byte_order == "big" else cls._PACKER_LE
+        return packer.iter_unpack(raw)
 
 
 class version_min_command(Struct):
     _FIELDNAMES = ["cmd", "cmdsize", "version", "reserved"]
     _SIZES = [4, 4, 4, 4]
     SIZE = sum(_SIZES)
-
-    def __init__(self, byte_order="little"):
-        super().__init__(fields=self._FIELDNAMES, sizes=self._SIZES, byte_order=byte_order)
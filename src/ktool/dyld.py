@@ -322,7 +322,7 @@ class Library:
 
         off = dyld_header.SIZE
         off += self.macho_header.dyld_header.loadsize
-        raw = load_cmd.raw + encoded + (b'\x00' * (cmdsize - (lc_type.SIZE + len(encoded))))
+        raw = bytes(load_cmd.raw) + encoded + (b'\x00' * (cmdsize - (lc_type.SIZE + len(encoded))))
         log.debug(f'Padding Size {(cmdsize - (lc_type.SIZE + len(encoded)))}')
         size = len(raw)
 
@@ -495,6 +495,9 @@ class Symbol:
         self.ordinal = ordinal
 
 
+symtab_record = namedtuple("symtab_record", symtab_entry._FIELDNAMES)
+
+
 class SymbolTable:
     """
     This class represents the symbol table declared in the MachO File
@@ -503,6 +506,9 @@ class SymbolTable:
 
     .ext contains exported symbols, i think?
 
+    The entries are parsed in bulk, and each Symbol's .entry is a read-only symtab_record namedtuple rather than
+        a symtab_entry Struct. Use .load_entry(index) to get the symtab_entry for .table[index].
+
     This class is incomplete
 
     """
@@ -512,11 +518,24 @@ class SymbolTable:
         self.ext = []
         self.table = self._load_symbol_table()
 
+    def load_entry(self, index):
+        """
+        Load the symtab_entry Struct for an entry in the table
+
+        :param index: Index of the entry in .table
+        :return: symtab_entry, with .off set to its file offset
+        """
+        if not 0 <= index < self.cmd.nsyms:
+            raise IndexError(f'symbol table index {index} out of range')
+        return self.library.load_struct(self.cmd.symoff + symtab_entry.SIZE * index, symtab_entry)
+
     def _load_symbol_table(self):
-        symbol_table = []
-        read_address = self.cmd.symoff
-        for i in range(0, self.cmd.nsyms):
-            symbol_table.append(self.library.load_struct(read_address + symtab_entry.SIZE * i, symtab_entry))
+        size = symtab_entry.SIZE * self.cmd.nsyms
+        raw = self.library.slice.get_bytes_at(self.cmd.symoff, size)
+        if len(raw) < size:
+            # Truncated table; entries past the end of the file are loaded as zeroes
+            raw = bytes(raw).ljust(size, b'\x00')
+        symbol_table = list(map(symtab_record._make, symtab_entry.iter_unpack_bulk(raw)))
 
         table = []
         for sym in symbol_table:
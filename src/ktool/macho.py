@@ -287,6 +287,8 @@ class Slice:
         self.byte_order = "little" if self.get_at(0, 4, "little") == MH_MAGIC_64 else "big"
 
     def patch(self, address, raw):
+        # Struct.raw is a memoryview
+        raw = bytes(raw)
         self.macho_file.file.seek(self.offset + address)
         log.debug(f'Patched At: {hex(address)} ')
         log.debug(f'New Bytes: {str(raw)}')
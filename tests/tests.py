@@ -1,4 +1,6 @@
+import copy
 import os
+import pickle
 import sys
 import unittest
 
@@ -14,6 +16,13 @@ from ktool import (
     TapiYAMLWriter,
 )
 
+from kmacho.structs import (
+    Struct,
+    segment_command_64,
+    symtab_entry,
+    unk_command,
+)
+
 
 # We need to be in the right directory so we can find the bins
 scriptdir = os.path.dirname(os.path.realpath(__file__))
@@ -22,6 +31,102 @@ sys.path.extend([f'{scriptdir}/../src'])
 log.LOG_LEVEL = LogLevel.WARN
 
 
+class StructTestCase(unittest.TestCase):
+    def test_create_with_bytes(self):
+        raw = bytes(range(segment_command_64.SIZE))
+        for byte_order in ("little", "big"):
+            seg = Struct.create_with_bytes(segment_command_64, raw, byte_order)
+            self.assertEqual(seg.cmd, int.from_bytes(raw[0:4], byte_order))
+            self.assertEqual(seg.segname, int.from_bytes(raw[8:24], byte_order))
+            self.assertEqual(seg.vmaddr, int.from_bytes(raw[24:32], byte_order))
+            self.assertEqual(seg.flags, int.from_bytes(raw[68:72], byte_order))
+            self.assertEqual(bytes(seg.raw), raw)
+
+    def test_create_with_short_bytes(self):
+        cmd = Struct.create_with_bytes(unk_command, b'\x01\x02')
+        self.assertEqual((cmd.cmd, cmd.cmdsize), (0x201, 0))
+        self.assertEqual(bytes(cmd.raw), b'\x01\x02' + bytes(6))
+
+    def test_write_before_decode(self):
+        raw = bytes(range(segment_command_64.SIZE))
+        seg = Struct.create_with_bytes(segment_command_64, raw)
+        seg.nsects = 5
+        self.assertEqual(seg.cmd, int.from_bytes(raw[0:4], "little"))
+        self.assertEqual(seg.nsects, 5)
+        self.assertEqual(bytes(seg.raw)[64:68], b'\x05\x00\x00\x00')
+
+    def test_bytes_write_before_decode(self):
+        seg = Struct.create_with_bytes(unk_command, bytes(8))
+        seg.cmd = b'\x01\x02\x03\x04'
+        self.assertEqual(seg.cmdsize, 0)
+        self.assertEqual(seg.cmd, b'\x01\x02\x03\x04')
+        self.assertEqual(bytes(seg.raw), b'\x01\x02\x03\x04\x00\x00\x00\x00')
+
+    def test_decode_before_initialized(self):
+        for byte_order in ("little", "big"):
+            sym = symtab_entry(byte_order)
+            sym.value = 7
+            sym._raw_buf[:] = bytes(range(symtab_entry.SIZE))
+            self.assertEqual(sym.type, 4)
+            self.assertEqual(sym.desc, int.from_bytes(bytes([6, 7]), byte_order))
+            self.assertEqual(sym.value, 7)
+
+    def test_copy(self):
+        raw = bytes(range(segment_command_64.SIZE))
+        seg = Struct.create_with_bytes(segment_command_64, raw, "big")
+        seg.off = 0x20
+        seg.nsects = 5
+        for dup in (copy.copy(seg), copy.deepcopy(seg), pickle.loads(pickle.dumps(seg))):
+            self.assertEqual(bytes(dup.raw), bytes(seg.raw))
+            self.assertEqual(dup.nsects, 5)
+            self.assertEqual(dup.vmaddr, seg.vmaddr)
+            self.assertEqual(dup.off, 0x20)
+            dup.flags = 1
+            self.assertNotEqual(bytes(dup.raw), bytes(seg.raw))
+
+        cmd = unk_command()
+        cmd.cmd = 5
+        dup = copy.copy(cmd)
+        self.assertFalse(dup.initialized)
+        self.assertEqual((dup.cmd, dup.cmdsize), (5, 0))
+
+    def test_set_initialized(self):
+        cmd = unk_command()
+        cmd.cmd = 5
+        cmd.initialized = True
+        self.assertEqual((cmd.cmdsize, cmd.cmd), (0, 5))
+        self.assertEqual(bytes(cmd.raw), b'\x05' + bytes(7))
+
+    def test_create_with_values(self):
+        sym = Struct.create_with_values(symtab_entry, [0x10, 0xf, 1, 0x20, 0x100000000])
+        self.assertEqual(bytes(sym.raw), b'\x10\x00\x00\x00\x0f\x01\x20\x00\x00\x00\x00\x00\x01\x00\x00\x00')
+        sym.type = 0xe
+        self.assertEqual(bytes(sym.raw)[4], 0xe)
+        self.assertEqual(Struct.create_with_bytes(symtab_entry, sym.raw).type, 0xe)
+
+    def test_batch_update(self):
+        raw = bytes(range(segment_command_64.SIZE))
+        seg = Struct.create_with_bytes(segment_command_64, raw)
+        with seg.batch_update():
+            seg.nsects = 5
+            seg.flags = 6
+            self.assertEqual(bytes(seg.raw), raw)
+        self.assertEqual(bytes(seg.raw)[64:], b'\x05\x00\x00\x00\x06\x00\x00\x00')
+        self.assertEqual(bytes(seg.raw)[:64], raw[:64])
+
+        seg.bulk_set(nsects=7, flags=8)
+        self.assertEqual(bytes(seg.raw)[64:], b'\x07\x00\x00\x00\x08\x00\x00\x00')
+
+    def test_symtab_iter_unpack_bulk(self):
+        raw = bytes(range(symtab_entry.SIZE * 3))
+        for byte_order in ("little", "big"):
+            entries = list(symtab_entry.iter_unpack_bulk(raw, byte_order))
+            self.assertEqual(len(entries), 3)
+            for i, entry in enumerate(entries):
+                sym = Struct.create_with_bytes(symtab_entry, raw[i * symtab_entry.SIZE:], byte_order)
+                self.assertEqual(entry, (sym.str_index, sym.type, sym.sect_index, sym.desc, sym.value))
+
+
 class SymTabTestCase(unittest.TestCase):
     def test_bin(self):
         with open(scriptdir + '/bins/testbin1', 'rb') as file:
@@ -29,6 +134,16 @@ class SymTabTestCase(unittest.TestCase):
             library = Dyld.load(machofile.slices[0])
             self.assertEqual(len(library.symbol_table.table), 23)
 
+    def test_load_entry(self):
+        with open(scriptdir + '/bins/testbin1', 'rb') as file:
+            machofile = MachOFile(file)
+            library = Dyld.load(machofile.slices[0])
+            symbol_table = library.symbol_table
+            for i, symbol in enumerate(symbol_table.table):
+                entry = symbol_table.load_entry(i)
+                self.assertEqual(entry.off, symbol_table.cmd.symoff + i * symtab_entry.SIZE)
+                self.assertEqual(tuple(symbol.entry), tuple(getattr(entry, f) for f in symtab_entry._FIELDNAMES))
+
 
 class TBDTestCase(unittest.TestCase):
     def test_tapi_dump(self):